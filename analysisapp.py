@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from pattern_cache import pattern_cache
 
 def dumb_buy_sell_strategy(df: pd.DataFrame) -> tuple[pd.DataFrame, list]:
     df = df.copy()
@@ -162,10 +163,12 @@ def projection_pattern_strategy(
     equity_at_buy = 0 # To track capital invested in a trade
 
 
-    def f_up(closes, i):
-        return closes[i] > closes[i + 1]
-
     closes = df['Close'].values
+    # Up/down pattern codes, per-code match positions and forward returns, shared across sessions and runs
+    # (aligned on bar timestamps, so a window that moved on reuses them; head is this frame's first bar within them)
+    timestamps = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else None
+    codes, code_positions, forward_returns, head = pattern_cache.get_artifacts(closes, pattern_len, proj_len, timestamps)
+    no_positions = np.zeros(0, dtype=np.int64)
 
     for i in range(min_bars, len(df) - proj_len - pattern_offset - pattern_len):
          # Carry forward the equity and drawdown from the previous step
@@ -178,20 +181,17 @@ def projection_pattern_strategy(
              continue
 
          base_idx = i - pattern_offset
-         pattern = [f_up(closes, base_idx + j) for j in range(pattern_len)]
-         matches = []
-         base_price = closes[base_idx]
-
-         for j in range(pattern_offset + pattern_len, i - proj_len):
-             match = [f_up(closes, j + k) for k in range(pattern_len)]
-             if match == pattern:
-                 pct_changes = [(closes[j + k] - closes[j + k - 1]) / closes[j + k - 1] for k in range(pattern_len, pattern_len + proj_len)]
-                 matches.append(pct_changes)
-                 if len(matches) >= max_matches:
-                     break
-
-         if matches:
-             proj_matrix = np.array(matches)
+         pattern = codes[head + base_idx]
+
+         # Earliest positions j in [pattern_offset + pattern_len, i - proj_len) with the same pattern
+         # (positions, and so matches, are in the cached artifacts' coordinates, shifted by head)
+         positions = code_positions.get(int(pattern), no_positions)
+         first = np.searchsorted(positions, head + pattern_offset + pattern_len)
+         last = min(np.searchsorted(positions, head + i - proj_len), first + max_matches)
+         matches = positions[first:last]
+
+         if matches.size:
+             proj_matrix = forward_returns[matches + pattern_len]
              avg_proj = np.mean(proj_matrix, axis=0)
              avg_direction = np.mean(avg_proj) * 100  # convert to percent
 
@@ -272,4 +272,78 @@ def projection_pattern_strategy(
               df.loc[df.index[i], 'Drawdown'] = equity - peak_equity
 
 
-    return df, trade_log
\ No newline at end of file
+    return df, trade_log
+
+def moving_average_crossover_sweep(df: pd.DataFrame, short_windows, long_windows, chunk_cells=2_000_000) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Evaluate moving_average_crossover_strategy for every (short, long) window pair at once.
+
+    SMAs are computed once per distinct window into a (windows x bars) matrix, and the
+    crossover position, realized equity and trade count of every valid pair (short < long) are
+    derived vectorized over pairs. Pairs are processed in chunks of at most `chunk_cells`
+    (pairs x bars) values so peak memory stays bounded however many pairs and bars are swept; the
+    SMA matrix is shared by all chunks. Trading rules match moving_average_crossover_strategy: all-in
+    long entries, signals evaluated from bar `long_window` onwards, open positions not marked to market.
+
+    Returns two DataFrames indexed by short window with long windows as columns:
+    ending capital and number of completed trades (NaN for invalid pairs).
+    """
+    short_windows = np.unique(np.asarray(short_windows, dtype=int))
+    long_windows = np.unique(np.asarray(long_windows, dtype=int))
+    index = pd.Index(short_windows, name='Short Window')
+    columns = pd.Index(long_windows, name='Long Window')
+    ending_capital = np.full((len(short_windows), len(long_windows)), np.nan)
+    trade_counts = ending_capital.copy()
+
+    short_grid, long_grid = np.meshgrid(short_windows, long_windows, indexing='ij')
+    valid = (short_grid < long_grid) & (short_grid > 0)
+    pair_short = short_grid[valid]
+    pair_long = long_grid[valid]
+
+    closes = df['Close'].to_numpy(dtype=float)
+    n = len(closes)
+    if n < 2 or pair_short.size == 0:
+        ending_capital[valid] = 10000.0
+        trade_counts[valid] = 0
+        return pd.DataFrame(ending_capital, index=index, columns=columns), pd.DataFrame(trade_counts, index=index, columns=columns)
+
+    # SMA matrix (windows x bars), one row per distinct window; NaN until a window has enough bars.
+    # Rows use the same rolling mean as moving_average_crossover_strategy, so SMAs that are equal
+    # in exact arithmetic compare the same way here as in the loop (a global cumulative sum would
+    # leave residues of a different sign on quantized prices and flip crossovers)
+    windows = np.union1d(pair_short, pair_long)
+    bars = np.arange(n)
+    sma = np.vstack([df['Close'].rolling(window=window).mean().to_numpy(dtype=float) for window in windows])
+
+    log_returns = np.diff(np.log(closes))
+    pair_capital = np.empty(pair_short.size)
+    pair_trades = np.empty(pair_short.size)
+    chunk_pairs = max(1, chunk_cells // n)
+
+    for start in range(0, pair_short.size, chunk_pairs):
+        chunk = slice(start, start + chunk_pairs)
+        chunk_long = pair_long[chunk]
+
+        # Position after each bar: long when short SMA > long SMA, flat when below, unchanged on ties
+        diff = sma[np.searchsorted(windows, pair_short[chunk])] - sma[np.searchsorted(windows, chunk_long)]
+        state = np.where(diff > 0, 1.0, np.where(diff < 0, 0.0, np.nan))
+        state[bars[None, :] < chunk_long[:, None]] = 0.0
+        last_set = np.maximum.accumulate(np.where(np.isnan(state), 0, bars[None, :]), axis=1)
+        state = np.take_along_axis(state, last_set, axis=1)
+
+        # Cumulative log return while in position, realized only at exit bars
+        held_log = np.zeros_like(state)
+        held_log[:, 1:] = np.cumsum(state[:, :-1] * log_returns[None, :], axis=1)
+        exits = np.zeros(state.shape, dtype=bool)
+        exits[:, 1:] = (state[:, :-1] == 1.0) & (state[:, 1:] == 0.0)
+        last_exit = np.maximum.accumulate(np.where(exits, bars[None, :], -1), axis=1)
+        realized = np.where(last_exit >= 0, np.take_along_axis(held_log, np.clip(last_exit, 0, None), axis=1), 0.0)
+
+        # Equity at the last bar is recorded before that bar's own signal is processed
+        pair_capital[chunk] = 10000 * np.exp(realized[:, -2])
+        pair_trades[chunk] = exits.sum(axis=1)
+
+    ending_capital[valid] = pair_capital
+    trade_counts[valid] = pair_trades
+
+    return pd.DataFrame(ending_capital, index=index, columns=columns), pd.DataFrame(trade_counts, index=index, columns=columns)
@@ -47,6 +47,29 @@ def generate_candlestick_chart(df: pd.DataFrame, df_signals: pd.DataFrame):
     return fig # Return the figure instead of displaying it
 
 
+def generate_crossover_heatmap(ending_capital: pd.DataFrame):
+    """
+    Heatmap of ending capital per (short, long) window pair from moving_average_crossover_sweep.
+    """
+    fig = go.Figure(go.Heatmap(
+        z=ending_capital.values,
+        x=ending_capital.columns,
+        y=ending_capital.index,
+        colorscale='RdYlGn',
+        zmid=10000, # Starting capital as the neutral colour
+        colorbar=dict(title="Ending Capital"),
+        hovertemplate="Short: %{y}<br>Long: %{x}<br>Ending Capital: $%{z:,.2f}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title="🌡️ Moving Average Crossover Sweep",
+        xaxis_title="Long Window",
+        yaxis_title="Short Window",
+        height=600
+    )
+    return fig
+
+
 def analyze_strategy_results(df_signals: pd.DataFrame, trade_log: list):
     """
     Analyzes strategy results and prepares data for display.
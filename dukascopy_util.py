@@ -141,4 +141,34 @@ def fetch_stock_indices_data(
     df.sort_index(ascending=True, inplace=True)
 
 
-    return df
\ No newline at end of file
+    return df
+
+def fetch_bars_since(
+    instrument: str,
+    since: pd.Timestamp,
+    offer_side: str = "B",
+    interval: str = "15MIN",
+    limit: int = 10,
+    max_limit: int = 1000,
+    user_agent: str = DEFAULT_USER_AGENT
+) -> pd.DataFrame:
+    """
+    Fetch only the bars at or after `since`, the timestamp of the last bar already held.
+
+    The bar at `since` itself is returned again because the most recent bar is usually still
+    forming and its values change between polls. A small page of `limit` bars is requested;
+    if it does not reach back to `since` (e.g. after a long pause) the page size is doubled
+    up to `max_limit` so no bars are skipped.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame indexed by Date with columns [Open, High, Low, Close, Volume].
+    """
+    while True:
+        df = fetch_stock_indices_data(instrument, offer_side, interval, limit, "P", user_agent)
+        if df.empty or df.index[0] <= since or limit >= max_limit:
+            break
+        limit = min(limit * 2, max_limit)
+
+    return df[df.index >= since]
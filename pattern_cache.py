@@ -0,0 +1,245 @@
+"""
+pattern_cache.py
+
+Process-wide cache of derived pattern artifacts for projection_pattern_strategy.
+
+For a close-price series the cache holds, per pattern_len, the up/down pattern code
+of every bar and an index of the positions where each code occurs, and per proj_len
+the matrix of forward percentage changes. Entries are shared by every session and
+optimizer run in the process and are matched by aligning bar timestamps, so a
+trailing window that moved on (leading bars dropped, new bars appended, forming
+last bar revised) reuses the cached artifacts: they are sliced past the dropped
+head and extended incrementally over the new bars. Whole series are evicted
+least-recently-used first once the cache exceeds its memory budget.
+"""
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024 # Memory budget of the shared cache
+
+
+def _encode_patterns(closes: np.ndarray, pattern_len: int) -> np.ndarray:
+    """
+    Pattern code of every start position j: bit k is set when closes[j + k] > closes[j + k + 1]
+    (the up/down test used by projection_pattern_strategy).
+    """
+    num_codes = len(closes) - pattern_len
+    if num_codes <= 0:
+        return np.zeros(0, dtype=np.int64)
+    up = (closes[:-1] > closes[1:]).astype(np.int64)
+    codes = np.zeros(num_codes, dtype=np.int64)
+    for k in range(pattern_len):
+        codes |= up[k:k + num_codes] << k
+    return codes
+
+
+def _forward_rows(closes: np.ndarray, start: int, proj_len: int) -> np.ndarray:
+    """
+    Rows m = start .. len(closes) - proj_len of the forward-return matrix, where row m holds the
+    percentage changes of bars m .. m + proj_len - 1 (undefined change of bar 0 is NaN).
+    """
+    if len(closes) - proj_len < start:
+        return np.zeros((0, proj_len))
+    if start == 0:
+        pct_changes = np.concatenate(([np.nan], (closes[1:] - closes[:-1]) / closes[:-1]))
+    else:
+        segment = closes[start - 1:]
+        pct_changes = (segment[1:] - segment[:-1]) / segment[:-1]
+    return np.lib.stride_tricks.sliding_window_view(pct_changes, proj_len).copy()
+
+
+def _index_positions(codes: np.ndarray, offset: int = 0) -> dict:
+    """Map each code to the sorted array of positions (shifted by `offset`) where it occurs."""
+    order = np.argsort(codes, kind='stable')
+    unique_codes, first = np.unique(codes[order], return_index=True)
+    return {int(code): positions + offset for code, positions in zip(unique_codes, np.split(order, first[1:]))}
+
+
+class PatternIndex:
+    """
+    Derived pattern artifacts for one close-price series, built lazily per pattern_len / proj_len.
+
+    Artifacts are built from this object's own closes and never replaced; a changed series gets
+    a new PatternIndex (see rebased), so callers can keep using an index while another session
+    extends or revises the series.
+    """
+
+    def __init__(self, closes: np.ndarray, timestamps: np.ndarray):
+        self.closes = closes
+        self.timestamps = timestamps
+        self._codes = {}
+        self._positions = {}
+        self._forward = {}
+
+    @property
+    def nbytes(self) -> int:
+        total = self.closes.nbytes + self.timestamps.nbytes
+        total += sum(codes.nbytes for codes in self._codes.values())
+        total += sum(rows.nbytes for rows in self._forward.values())
+        total += sum(positions.nbytes for index in self._positions.values() for positions in index.values())
+        return total
+
+    def codes(self, pattern_len: int) -> np.ndarray:
+        """Up/down pattern code of every bar, for patterns of `pattern_len` bars."""
+        if pattern_len not in self._codes:
+            self._codes[pattern_len] = _encode_patterns(self.closes, pattern_len)
+        return self._codes[pattern_len]
+
+    def positions(self, pattern_len: int) -> dict:
+        """Sorted positions of every pattern code, for patterns of `pattern_len` bars."""
+        if pattern_len not in self._positions:
+            self._positions[pattern_len] = _index_positions(self.codes(pattern_len))
+        return self._positions[pattern_len]
+
+    def forward_returns(self, proj_len: int) -> np.ndarray:
+        """Forward-return matrix: row m holds the percentage changes of bars m .. m + proj_len - 1."""
+        if proj_len not in self._forward:
+            self._forward[proj_len] = _forward_rows(self.closes, 0, proj_len)
+        return self._forward[proj_len]
+
+    def align(self, closes: np.ndarray, timestamps: np.ndarray) -> Optional[tuple[int, int]]:
+        """
+        Locate `closes` in this series by its first timestamp. Returns (head, keep): the position of the
+        caller's first bar here and how many bars from there agree in timestamp and close. Only the
+        last overlapping bar may differ (a revised forming bar); otherwise, or without a common first
+        timestamp, the series are unrelated and None is returned.
+        """
+        head = int(np.searchsorted(self.timestamps, timestamps[0]))
+        if head >= len(self.timestamps) or self.timestamps[head] != timestamps[0]:
+            return None
+
+        overlap = min(len(self.timestamps) - head, len(timestamps))
+        mismatches = np.flatnonzero(
+            (self.timestamps[head:head + overlap] != timestamps[:overlap]) | (self.closes[head:head + overlap] != closes[:overlap])
+        )
+        keep = int(mismatches[0]) if mismatches.size else overlap
+        if keep < overlap - 1:
+            return None
+        return head, keep
+
+    def rebased(self, closes: np.ndarray, timestamps: np.ndarray, head: int, keep: int) -> 'PatternIndex':
+        """
+        New index for `closes`, whose first `keep` bars equal this series' bars from `head` on: artifacts
+        already built are sliced past the dropped head, truncated to what the shared bars determine and
+        extended over the new bars. This index is left unchanged, so callers already holding it keep
+        consistent artifacts.
+        """
+        index = PatternIndex(closes, timestamps)
+
+        for pattern_len, codes in self._codes.items():
+            valid = max(keep - pattern_len, 0)
+            new_codes = _encode_patterns(closes[valid:], pattern_len)
+            index._codes[pattern_len] = np.concatenate([codes[head:head + valid], new_codes])
+
+            if pattern_len in self._positions:
+                positions_index = {
+                    code: positions[(positions >= head) & (positions < head + valid)] - head
+                    for code, positions in self._positions[pattern_len].items()
+                }
+                for code, positions in _index_positions(new_codes, valid).items():
+                    positions_index[code] = np.concatenate([positions_index[code], positions]) if code in positions_index else positions
+                index._positions[pattern_len] = {code: positions for code, positions in positions_index.items() if positions.size}
+
+        for proj_len, rows in self._forward.items():
+            valid = max(min(keep - proj_len + 1, len(rows) - head), 0)
+            index._forward[proj_len] = np.concatenate([rows[head:head + valid], _forward_rows(closes, valid, proj_len)])
+
+        return index
+
+
+class PatternCache:
+    """
+    Thread-safe LRU cache of PatternIndex objects, matched to callers by aligning bar timestamps
+    and bounded by `max_bytes` (the most recently used series is always kept).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+
+    def get(self, closes, timestamps=None) -> tuple[PatternIndex, int]:
+        """
+        PatternIndex covering `closes`, and the position of the caller's first bar in it.
+
+        `timestamps` (int64, e.g. DatetimeIndex.asi8) let a trailing window that moved on reuse
+        the cached series; without them bar positions are used, so only a series extending the
+        cached one from its first bar is reused. The returned index may cover more bars than
+        `closes` (before `head` or after its end); artifacts for the caller's bars are identical
+        either way. A series that moved on replaces the cache entry with a new index, so an index
+        already returned never changes underneath its holder.
+        """
+        with self._lock:
+            return self._lookup(closes, timestamps)
+
+    def get_artifacts(self, closes, pattern_len: int, proj_len: int, timestamps=None) -> tuple[np.ndarray, dict, np.ndarray, int]:
+        """
+        Pattern codes, per-code positions and forward-return matrix for one strategy run, plus the
+        offset of the caller's first bar within them (positions are in the artifacts' coordinates).
+        """
+        # Lookup, rebase and artifact build happen under one lock so another session cannot swap the entry in between
+        with self._lock:
+            index, head = self._lookup(closes, timestamps)
+            artifacts = index.codes(pattern_len), index.positions(pattern_len), index.forward_returns(proj_len), head
+            self._evict()
+        return artifacts
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """Change the memory budget, evicting least-recently-used series if needed."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(index.nbytes for index in self._entries.values())
+
+    def _lookup(self, closes, timestamps) -> tuple[PatternIndex, int]:
+        """Find, rebase or create the index for `closes`. Caller must hold the lock."""
+        closes = np.ascontiguousarray(closes, dtype=float)
+        timestamps = np.arange(len(closes), dtype=np.int64) if timestamps is None else np.ascontiguousarray(timestamps, dtype=np.int64)
+        if not len(closes):
+            return PatternIndex(closes, timestamps), 0
+
+        # Most recently used first
+        for key in reversed(self._entries):
+            index = self._entries[key]
+            aligned = index.align(closes, timestamps)
+            if aligned is None:
+                continue
+
+            head, keep = aligned
+            if keep < len(closes):
+                index = index.rebased(closes.copy(), timestamps.copy(), head, keep)
+                head = 0
+                self._entries[key] = index
+            self._entries.move_to_end(key)
+            return index, head
+
+        index = PatternIndex(closes.copy(), timestamps.copy())
+        self._entries[next(self._keys)] = index
+        return index, 0
+
+    def _evict(self) -> None:
+        total = sum(index.nbytes for index in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, index = self._entries.popitem(last=False)
+            total -= index.nbytes
+
+
+# Shared by every session and optimizer run in this process
+pattern_cache = PatternCache()
@@ -0,0 +1,260 @@
+"""
+robustness.py
+
+Bootstrap / Monte Carlo robustness testing of strategy results.
+
+A single backtest gives one historical path. Here the trade-level returns are
+resampled with replacement and the bar-level strategy returns are block-bootstrapped
+thousands of times, in vectorized batches spread across worker processes, to get
+confidence intervals for ending capital, max drawdown and win rate.
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+STARTING_CAPITAL = 10000
+PARALLEL_MIN_CELLS = 5_000_000 # Resampled values (resamples x path length) below which batches run in-process
+BATCH_MAX_CELLS = 1_000_000 # Resampled values per batch; bounds each batch's (and each worker's) working memory
+
+
+def extract_trade_returns(trade_log: list) -> np.ndarray:
+    """
+    Fractional return of every completed trade in a strategy trade log.
+
+    Strategies invest all capital, so a SELL entry's return is its Capital (after the trade)
+    over the capital invested in the trade, minus one.
+    """
+    returns = [
+        trade['Capital'] / trade['Invested in this trade'] - 1
+        for trade in trade_log
+        if trade['Buy/sell'] == 'SELL' and trade['Invested in this trade']
+    ]
+    return np.asarray(returns, dtype=float)
+
+
+def extract_bar_returns(df_signals: pd.DataFrame) -> np.ndarray:
+    """
+    Mark-to-market strategy return for every bar: the Close-to-Close return while a
+    position is held (between a BUY and the following SELL signal), zero otherwise.
+    """
+    if df_signals.empty or len(df_signals) < 2:
+        return np.zeros(0)
+
+    position = df_signals['Signal'].map({'BUY': 1.0, 'SELL': 0.0}).ffill().fillna(0.0).to_numpy()
+    closes = df_signals['Close'].to_numpy(dtype=float)
+    return position[:-1] * (closes[1:] / closes[:-1] - 1)
+
+
+def _path_metrics(returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Ending capital and max drawdown (%) of each row of a (resamples x steps) return matrix."""
+    equity = STARTING_CAPITAL * np.cumprod(1 + returns, axis=1)
+    peak_equity = np.maximum.accumulate(np.maximum(equity, STARTING_CAPITAL), axis=1)
+    max_drawdown = ((peak_equity - equity) / peak_equity * 100).max(axis=1)
+    return equity[:, -1].copy(), max_drawdown # Copy so the result does not keep the whole equity matrix alive
+
+
+def _trade_resample_batch(trade_returns: np.ndarray, size: int, seed: np.random.SeedSequence) -> dict:
+    rng = np.random.default_rng(seed)
+    resampled = trade_returns[rng.integers(0, len(trade_returns), (size, len(trade_returns)))]
+    ending_capital, max_drawdown = _path_metrics(resampled)
+    return {
+        'Ending Capital': ending_capital,
+        'Max Drawdown (%)': max_drawdown,
+        'Profitable Trades (%)': (resampled > 0).mean(axis=1) * 100
+    }
+
+
+def _block_bootstrap_batch(bar_returns: np.ndarray, size: int, seed: np.random.SeedSequence, block_len: int) -> dict:
+    rng = np.random.default_rng(seed)
+    n = len(bar_returns)
+    num_blocks = -(-n // block_len)
+    # Circular block bootstrap: random block starts, wrapping around the end of the series
+    starts = rng.integers(0, n, (size, num_blocks))
+    positions = (starts[:, :, None] + np.arange(block_len)) % n
+    resampled = bar_returns[positions.reshape(size, -1)[:, :n]]
+    ending_capital, max_drawdown = _path_metrics(resampled)
+    return {
+        'Ending Capital': ending_capital,
+        'Max Drawdown (%)': max_drawdown
+    }
+
+
+@contextmanager
+def _executor(workers: Optional[int], cells: int):
+    """
+    One process pool for a whole top-level call, or None (run in-process) when a single worker
+    is requested or the job is too small to repay the pool's startup cost.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or cells < PARALLEL_MIN_CELLS:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield executor
+
+
+def _submit_batches(executor, batch_fn, data: np.ndarray, n_resamples: int, batch_cells: int, seed, *args) -> list:
+    """
+    Split n_resamples into batches of at most `batch_cells` resampled values (resamples x path length)
+    with independent seeds; submit them to `executor` or run them in-process.
+    """
+    batch_size = max(1, batch_cells // len(data))
+    sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size:
+        sizes.append(n_resamples % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if executor is None:
+        return [batch_fn(data, size, batch_seed, *args) for size, batch_seed in zip(sizes, seeds)]
+    return [executor.submit(batch_fn, data, size, batch_seed, *args) for size, batch_seed in zip(sizes, seeds)]
+
+
+def _gather(batches: list) -> dict:
+    """Wait for submitted batches and concatenate their metrics."""
+    batches = [batch.result() if isinstance(batch, Future) else batch for batch in batches]
+    return {metric: np.concatenate([batch[metric] for batch in batches]) for metric in batches[0]}
+
+
+def _trade_batches(executor, trade_returns: np.ndarray, n_resamples: int, batch_cells: int, seed) -> list:
+    if trade_returns.size == 0:
+        return [{
+            'Ending Capital': np.full(n_resamples, float(STARTING_CAPITAL)),
+            'Max Drawdown (%)': np.zeros(n_resamples),
+            'Profitable Trades (%)': np.zeros(n_resamples)
+        }]
+    return _submit_batches(executor, _trade_resample_batch, trade_returns, n_resamples, batch_cells, seed)
+
+
+def _bar_batches(executor, bar_returns: np.ndarray, n_resamples: int, block_len: int, batch_cells: int, seed) -> list:
+    if bar_returns.size == 0:
+        return [{
+            'Ending Capital': np.full(n_resamples, float(STARTING_CAPITAL)),
+            'Max Drawdown (%)': np.zeros(n_resamples)
+        }]
+    block_len = max(1, min(block_len, bar_returns.size))
+    return _submit_batches(executor, _block_bootstrap_batch, bar_returns, n_resamples, batch_cells, seed, block_len)
+
+
+def bootstrap_trades(
+    trade_log: list,
+    n_resamples: int = 10000,
+    batch_cells: int = BATCH_MAX_CELLS,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None
+) -> dict:
+    """
+    Resample the trade-level return sequence with replacement.
+
+    Returns a dict of arrays (one value per resample) for Ending Capital,
+    Max Drawdown (%) and Profitable Trades (%).
+    """
+    trade_returns = extract_trade_returns(trade_log)
+    with _executor(workers, n_resamples * trade_returns.size) as executor:
+        return _gather(_trade_batches(executor, trade_returns, n_resamples, batch_cells, seed))
+
+
+def block_bootstrap_bars(
+    df_signals: pd.DataFrame,
+    n_resamples: int = 10000,
+    block_len: int = 10,
+    batch_cells: int = BATCH_MAX_CELLS,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None
+) -> dict:
+    """
+    Circular block bootstrap of the strategy's bar returns, preserving short-range
+    autocorrelation within blocks of `block_len` bars.
+
+    Returns a dict of arrays (one value per resample) for Ending Capital and Max Drawdown (%).
+    """
+    bar_returns = extract_bar_returns(df_signals)
+    with _executor(workers, n_resamples * bar_returns.size) as executor:
+        return _gather(_bar_batches(executor, bar_returns, n_resamples, block_len, batch_cells, seed))
+
+
+def robustness_summary(
+    df_signals: pd.DataFrame,
+    trade_log: list,
+    n_resamples: int = 10000,
+    block_len: int = 10,
+    confidence: float = 0.9,
+    batch_cells: int = BATCH_MAX_CELLS,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Confidence intervals from both the trade resample and the bar block bootstrap.
+
+    Returns a DataFrame indexed by (Method, Metric) with Lower, Median and Upper columns,
+    where Lower/Upper bound the central `confidence` share of the resampled values.
+    """
+    tail = (1 - confidence) / 2 * 100
+    percentiles = [tail, 50, 100 - tail]
+    trade_returns = extract_trade_returns(trade_log)
+    bar_returns = extract_bar_returns(df_signals)
+
+    # Both methods' batches share one pool
+    with _executor(workers, n_resamples * (trade_returns.size + bar_returns.size)) as executor:
+        pending = {
+            'Trade Resample': _trade_batches(executor, trade_returns, n_resamples, batch_cells, seed),
+            'Bar Block Bootstrap': _bar_batches(executor, bar_returns, n_resamples, block_len, batch_cells, seed)
+        }
+        samples = {method: _gather(batches) for method, batches in pending.items()}
+
+    rows = {
+        (method, metric): np.percentile(values, percentiles)
+        for method, metrics in samples.items()
+        for metric, values in metrics.items()
+    }
+    summary = pd.DataFrame.from_dict(rows, orient='index', columns=['Lower', 'Median', 'Upper'])
+    summary.index = pd.MultiIndex.from_tuples(summary.index, names=['Method', 'Metric'])
+    return summary
+
+
+def rank_candidates(
+    candidates: list,
+    n_resamples: int = 10000,
+    percentile: float = 5.0,
+    batch_cells: int = BATCH_MAX_CELLS,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Rank optimizer candidates by risk-adjusted bootstrap percentiles rather than by their single historical path.
+
+    `candidates` is a list of (parameters, trade_log) pairs. Candidates are sorted by the
+    low `percentile` of their resampled ending capital (the outcome they beat in most
+    resamples), with the high percentile of max drawdown as a tie-breaker. Candidates that never
+    traded have no outcome to resample (a flat 10000 with no drawdown), so they are ranked last.
+    """
+    candidate_returns = [extract_trade_returns(trade_log) for _, trade_log in candidates]
+
+    # Every candidate's batches are submitted to one pool before any result is awaited
+    with _executor(workers, n_resamples * sum(returns.size for returns in candidate_returns)) as executor:
+        pending = [_trade_batches(executor, returns, n_resamples, batch_cells, seed) for returns in candidate_returns]
+        candidate_samples = [_gather(batches) for batches in pending]
+
+    records = []
+    for (parameters, _), trade_returns, samples in zip(candidates, candidate_returns, candidate_samples):
+        records.append({
+            'Parameters': parameters,
+            'Trades': trade_returns.size,
+            'Ending Capital': STARTING_CAPITAL * np.prod(1 + trade_returns),
+            f'Ending Capital (P{percentile:g})': np.percentile(samples['Ending Capital'], percentile),
+            'Ending Capital (P50)': np.percentile(samples['Ending Capital'], 50),
+            f'Max Drawdown (%) (P{100 - percentile:g})': np.percentile(samples['Max Drawdown (%)'], 100 - percentile),
+            'Profitable Trades (%) (P50)': np.percentile(samples['Profitable Trades (%)'], 50)
+        })
+
+    ranking = pd.DataFrame(records)
+    if ranking.empty:
+        return ranking
+    ranking['Traded'] = ranking['Trades'] > 0
+    return ranking.sort_values(
+        by=['Traded', f'Ending Capital (P{percentile:g})', f'Max Drawdown (%) (P{100 - percentile:g})'],
+        ascending=[False, False, True]
+    ).drop(columns='Traded').reset_index(drop=True)
@@ -0,0 +1,232 @@
+"""
+streaming_util.py
+
+Streaming ingestion of tick / sub-minute data from Dukascopy.
+
+Ticks are consumed from a generator, aggregated into OHLCV bars, and completed
+bars are kept in a fixed-size ring buffer and pushed to subscribed consumers,
+so memory stays constant no matter how long the stream runs.
+"""
+import time
+import warnings
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from dukascopy_util import DEFAULT_USER_AGENT, fetch_stock_indices_data
+
+
+def fetch_tick_pages(
+    instrument: str,
+    offer_side: str = "B",
+    interval: str = "TICK",
+    limit: int = 100,
+    poll_seconds: float = 1.0,
+    max_polls: Optional[int] = None,
+    max_limit: int = 10000,
+    user_agent: str = DEFAULT_USER_AGENT
+) -> Iterator[tuple[pd.Timestamp, float, float]]:
+    """
+    Poll Dukascopy in small pages and yield only rows not yielded before.
+
+    If more rows arrived since the last poll than fit in a page, the page size is doubled
+    (up to `max_limit`) until the page reaches back past the last row seen. A burst larger than
+    `max_limit` cannot be recovered: the rows before the page are lost and a RuntimeWarning is
+    issued. Rows sharing the last seen timestamp are told apart by their position in the page.
+
+    Parameters
+    ----------
+    instrument : str
+        Instrument symbol, e.g., "EUR/USD".
+    offer_side : str, default "B"
+        "B" for bid, "A" for ask.
+    interval : str, default "TICK"
+        Source interval, typically "TICK", "1SEC" or "10SEC".
+    limit : int, default 100
+        Number of rows requested per page.
+    poll_seconds : float, default 1.0
+        Delay between successive pages.
+    max_polls : int, optional
+        Stop after this many pages; poll forever when None.
+    max_limit : int, default 10000
+        Largest page size requested when catching up after a burst of rows.
+    user_agent : str
+        HTTP User-Agent header to mimic a browser.
+
+    Yields
+    ------
+    tuple
+        (timestamp, price, volume) in chronological order.
+    """
+    last_timestamp = None
+    seen_at_last = 0 # Rows already yielded that carry last_timestamp
+    polls = 0
+    while max_polls is None or polls < max_polls:
+        page_limit = limit
+        while True:
+            page = fetch_stock_indices_data(instrument, offer_side, interval, page_limit, "P", user_agent)
+            # The page must start strictly before last_timestamp to hold every row sharing it
+            if last_timestamp is None or page.empty or page.index[0] < last_timestamp:
+                break
+            if page_limit >= max_limit:
+                warnings.warn(
+                    f"More than {max_limit} rows arrived since {last_timestamp}; rows before {page.index[0]} were skipped.",
+                    RuntimeWarning
+                )
+                break
+            page_limit = min(page_limit * 2, max_limit)
+
+        if last_timestamp is not None:
+            start = page.index.searchsorted(last_timestamp, side="left")
+            if start < len(page) and page.index[start] == last_timestamp:
+                start += seen_at_last
+            page = page.iloc[start:]
+
+        if not page.empty:
+            prices = page["Close"].to_numpy(dtype=float)
+            volumes = page["Volume"].to_numpy(dtype=float) if "Volume" in page.columns else [0.0] * len(page)
+            for timestamp, price, volume in zip(page.index, prices, volumes):
+                yield timestamp, price, volume
+
+            if page.index[-1] == last_timestamp:
+                seen_at_last += len(page)
+            else:
+                last_timestamp = page.index[-1]
+                seen_at_last = int((page.index == last_timestamp).sum())
+
+        polls += 1
+        if max_polls is None or polls < max_polls:
+            time.sleep(poll_seconds)
+
+
+class BarAggregator:
+    """
+    Aggregate ticks into OHLCV bars of `bar_seconds` width.
+
+    Completed bars are appended to a ring buffer holding at most `capacity`
+    bars (older bars are dropped) and passed to every subscribed consumer.
+    Each bar is a dict with Date, Open, High, Low, Close and Volume keys.
+    """
+
+    def __init__(self, bar_seconds: int = 60, capacity: int = 1000):
+        if bar_seconds <= 0:
+            raise ValueError("bar_seconds must be positive.")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive.")
+        self.bar_seconds = bar_seconds
+        self.bars = deque(maxlen=capacity)
+        self._bar_ns = int(bar_seconds * 1_000_000_000)
+        self._consumers = []
+        self._current = None
+        self._current_bucket = None
+
+    def subscribe(self, consumer: Callable[[dict], None]) -> None:
+        """Register a callable that receives each completed bar."""
+        self._consumers.append(consumer)
+
+    def push(self, timestamp, price: float, volume: float = 0.0) -> Optional[dict]:
+        """
+        Add one tick. Returns the bar completed by this tick, if any.
+
+        Ticks older than the bar currently being built are ignored.
+        """
+        bucket = pd.Timestamp(timestamp).value // self._bar_ns
+        completed = None
+
+        if self._current is not None:
+            if bucket < self._current_bucket:
+                return None
+            if bucket > self._current_bucket:
+                completed = self._complete_current()
+
+        if self._current is None:
+            self._current_bucket = bucket
+            self._current = {
+                'Date': pd.Timestamp(bucket * self._bar_ns),
+                'Open': price,
+                'High': price,
+                'Low': price,
+                'Close': price,
+                'Volume': volume
+            }
+        else:
+            self._current['High'] = max(self._current['High'], price)
+            self._current['Low'] = min(self._current['Low'], price)
+            self._current['Close'] = price
+            self._current['Volume'] += volume
+
+        return completed
+
+    def push_bar(self, bar: dict) -> Optional[dict]:
+        """
+        Add an already aggregated bar (e.g. a row from fetch_bars_since) as the bar being built.
+
+        A bar with the same Date as the current one replaces it (the forming bar was revised);
+        a later bar completes the current one, which is returned. Older bars are ignored.
+        """
+        bucket = pd.Timestamp(bar['Date']).value // self._bar_ns
+        completed = None
+
+        if self._current is not None:
+            if bucket < self._current_bucket:
+                return None
+            if bucket > self._current_bucket:
+                completed = self._complete_current()
+
+        self._current_bucket = bucket
+        self._current = {key: bar[key] for key in ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')}
+        return completed
+
+    def flush(self) -> Optional[dict]:
+        """Complete and publish the partially built bar, if any."""
+        if self._current is None:
+            return None
+        return self._complete_current()
+
+    def to_dataframe(self, include_current: bool = False) -> pd.DataFrame:
+        """
+        Buffered bars as a DataFrame indexed by Date with columns [Open, High, Low, Close, Volume],
+        the same layout returned by fetch_stock_indices_data. With `include_current` the bar
+        still being built is appended as the last row.
+        """
+        bars = list(self.bars)
+        if include_current and self._current is not None:
+            bars.append(self._current)
+        df = pd.DataFrame(bars, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        df.set_index('Date', inplace=True)
+        return df
+
+    def _complete_current(self) -> dict:
+        bar = self._current
+        self._current = None
+        self._current_bucket = None
+        self.bars.append(bar)
+        for consumer in self._consumers:
+            consumer(bar)
+        return bar
+
+
+def stream_bars(
+    ticks: Iterable[tuple],
+    bar_seconds: int = 60,
+    capacity: int = 1000,
+    aggregator: Optional[BarAggregator] = None
+) -> Iterator[dict]:
+    """
+    Turn an iterable of (timestamp, price, volume) ticks into a generator of completed bars.
+
+    The partially built last bar is flushed when the tick source is exhausted.
+    Pass an existing `aggregator` to keep its ring buffer and subscribers.
+    """
+    if aggregator is None:
+        aggregator = BarAggregator(bar_seconds, capacity)
+
+    for timestamp, price, volume in ticks:
+        bar = aggregator.push(timestamp, price, volume)
+        if bar is not None:
+            yield bar
+
+    bar = aggregator.flush()
+    if bar is not None:
+        yield bar
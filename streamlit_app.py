@@ -1,11 +1,86 @@
 import streamlit as st
 from datetime import datetime, timezone
-from dukascopy_util import fetch_stock_indices_data
-from analysisapp import dumb_buy_sell_strategy, moving_average_crossover_strategy, projection_pattern_strategy
-from charting import generate_candlestick_chart, analyze_strategy_results # Import the separated functions
+from dukascopy_util import fetch_stock_indices_data, fetch_bars_since
+from analysisapp import dumb_buy_sell_strategy, moving_average_crossover_strategy, projection_pattern_strategy, moving_average_crossover_sweep
+from charting import generate_candlestick_chart, analyze_strategy_results, generate_crossover_heatmap # Import the separated functions
+from robustness import robustness_summary, rank_candidates
+from streaming_util import BarAggregator
 import pandas as pd # Import pandas for DataFrame operations
 import itertools # Import itertools for parameter combinations
 import numpy as np # Import numpy for arange
+import heapq # Import heapq for the bounded top-K leaderboard
+
+# Fixed-width record kept per optimizer run (one row of a preallocated structured array)
+OPTIMIZATION_RECORD_DTYPE = np.dtype([
+    ('pattern_len', np.int16),
+    ('proj_len', np.int16),
+    ('pattern_offset', np.int16),
+    ('max_matches', np.int16),
+    ('buy_threshold', np.float64),
+    ('sell_threshold', np.float64),
+    ('cooldown', np.int16),
+    ('min_bars', np.int16),
+    ('ending_capital', np.float64),
+    ('profit', np.float64)
+])
+
+LIVE_FETCH_LIMIT = 10 # Bars requested per live refresh; only bars after the last known timestamp are kept
+INTERVAL_SECONDS = {"15MIN": 900, "1HOUR": 3600, "1DAY": 86400} # Bar width of each analyzer interval
+
+
+def start_live_session(instrument, offer_side, interval, df, results, trade_log, strategy, strategy_params):
+    """
+    Seed live mode with the fetched data. Bars are held in a BarAggregator ring buffer sized to the
+    initial fetch, so the live window (and every refresh's work) stays the same size as time passes.
+    """
+    bars = BarAggregator(INTERVAL_SECONDS[interval], capacity=max(len(df) - 1, 1)) # + 1 forming bar
+    for date, row in df.iterrows():
+        bars.push_bar({'Date': date, **row.to_dict()})
+
+    st.session_state['live_session'] = {
+        'instrument': instrument,
+        'offer_side': offer_side,
+        'interval': interval,
+        'bars': bars,
+        'df': bars.to_dataframe(include_current=True),
+        'results': results,
+        'trade_log': trade_log,
+        'strategy': strategy,
+        'strategy_params': strategy_params
+    }
+
+
+def render_live_panel():
+    """
+    Poll for bars after the last known timestamp and push them into the fixed-size live window.
+    The strategy is rerun over that window only when a new bar appears; in-between polls just
+    refresh the forming candle. The chart is rebuilt from the window, so it stays the same size.
+    """
+    live = st.session_state['live_session']
+
+    try:
+        new_bars = fetch_bars_since(live['instrument'], live['df'].index[-1], live['offer_side'], live['interval'], LIVE_FETCH_LIMIT)
+    except Exception as e:
+        st.error(f"❌ Live refresh failed: {e}")
+        new_bars = live['df'].iloc[0:0]
+
+    if not new_bars.empty:
+        new_bar_appeared = False
+        for date, row in new_bars.iterrows():
+            if live['bars'].push_bar({'Date': date, **row.to_dict()}) is not None:
+                new_bar_appeared = True
+        live['df'] = live['bars'].to_dataframe(include_current=True)
+
+        if new_bar_appeared:
+            live['results'], live['trade_log'] = live['strategy'](live['df'], **live['strategy_params'])
+
+    summary_metrics, _ = analyze_strategy_results(live['results'], live['trade_log'])
+
+    st.subheader("🔴 Live")
+    st.write(f"🔄 **Last Refresh (UTC):** {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}")
+    st.write(f"📅 **Window:** {live['df'].index[0].strftime('%Y-%m-%d %H:%M:%S')} to {live['df'].index[-1].strftime('%Y-%m-%d %H:%M:%S')} (last {len(live['df'])} bars)")
+    st.write(f"📈 **Ending Capital (over the window):** ${summary_metrics['Ending Capital']:,.2f}")
+    st.plotly_chart(generate_candlestick_chart(live['df'], live['results']), use_container_width=True, key='live_chart')
 
 
 # Streamlit UI Setup
@@ -60,6 +135,16 @@ with tab1:
         strategy_params['cooldown'] = st.slider("Signal Cooldown (bars)", min_value=1, max_value=20, value=5, key='analyzer_cooldown') # Added unique key
         strategy_params['min_bars'] = st.slider("Minimum Bars Before Signal Calculation", min_value=50, max_value=500, value=100, key='analyzer_min_bars') # Added unique key
 
+    # Robustness testing
+    run_robustness = st.checkbox("🎲 Robustness Test (bootstrap / Monte Carlo)", key='analyzer_run_robustness')
+    if run_robustness:
+        robustness_resamples = st.number_input("Resamples", min_value=100, max_value=100000, value=10000, step=1000, key='analyzer_robustness_resamples')
+        robustness_block_len = st.slider("Bootstrap Block Length (bars)", min_value=1, max_value=50, value=10, key='analyzer_robustness_block_len')
+
+    # Live Mode
+    live_mode = st.checkbox("🔴 Live Mode (auto-refresh after Fetch & Analyze)", key='analyzer_live_mode')
+    if live_mode:
+        refresh_seconds = st.slider("Refresh Interval (seconds)", min_value=5, max_value=300, value=30, step=5, key='analyzer_refresh_seconds')
 
     # Fetch Button for Analyzer
     if st.button("Fetch & Analyze", key='run_analyzer'): # Added unique key
@@ -90,8 +175,15 @@ with tab1:
 
 
                 # --- Display Chart ---
-                chart_fig = generate_candlestick_chart(df, results) # Use the original df and results for chart
-                st.plotly_chart(chart_fig, use_container_width=True)
+                if live_mode:
+                    # The chart is rendered by the live panel below from the session's data window and signals
+                    start_live_session(
+                        instrument, offer_side, interval_options[interval], df, results, trade_log, selected_strategy, strategy_params
+                    )
+                else:
+                    st.session_state.pop('live_session', None)
+                    chart_fig = generate_candlestick_chart(df, results) # Use the original df and results for chart
+                    st.plotly_chart(chart_fig, use_container_width=True)
 
                 # --- Display Simple Trade Table ---
                 st.subheader("Detailed Trade Log")
@@ -106,12 +198,25 @@ with tab1:
                 st.write(f"**Max Drawdown:** {summary_metrics['Max Drawdown (%)']:,.2f}%")
                 st.write(f"**Profitable Trades:** {summary_metrics['Profitable Trades (%)']:,.2f}% ({summary_metrics['Profitable Trades Count']}/{summary_metrics['Total Trades Count']})")
 
+                # --- Display Robustness Section ---
+                if run_robustness:
+                    st.subheader("🎲 Robustness (90% Confidence Intervals)")
+                    st.write("Trades resampled with replacement and bar returns block-bootstrapped, so the single historical path can be judged against luck.")
+                    st.dataframe(robustness_summary(results, trade_log, robustness_resamples, robustness_block_len))
+
 
             else:
                 st.error("❌ No data received.")
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
+    # Live panel: reruns on its own timer without rerunning the rest of the app
+    if live_mode:
+        if 'live_session' in st.session_state:
+            st.fragment(run_every=refresh_seconds)(render_live_panel)()
+        else:
+            st.info("Press \"Fetch & Analyze\" to load initial data for live mode.")
+
 
 # --- Strategy Optimizer Tab ---
 with tab2:
@@ -146,29 +251,23 @@ with tab2:
     sell_threshold_range = st.slider("Sell Signal Threshold (%) Range", min_value=0.0, max_value=5.0, value=(0.1, 2.0), step=sell_threshold_step, key='opt_sell_threshold_range')
 
 
-    # Generate parameter combinations - only for the ranges
-    param_combinations = list(itertools.product(
-        [pattern_len_opt], # Use single value from slider
-        [proj_len_opt], # Use single value from slider
-        [pattern_offset_opt], # Use single value from slider
-        [max_matches_opt], # Use single value from slider
-        np.arange(buy_threshold_range[0], buy_threshold_range[1] + buy_threshold_step, buy_threshold_step), # Use range for buy threshold
-        np.arange(sell_threshold_range[0], sell_threshold_range[1] + sell_threshold_step, sell_threshold_step), # Use range for sell threshold
-        [cooldown_opt], # Use single value from slider
-        [min_bars_opt] # Use single value from slider
-    ))
+    # Threshold values for the ranges, rounded to match the step size
+    buy_threshold_values = np.round(np.arange(buy_threshold_range[0], buy_threshold_range[1] + buy_threshold_step, buy_threshold_step), 3)
+    sell_threshold_values = np.round(np.arange(sell_threshold_range[0], sell_threshold_range[1] + sell_threshold_step, sell_threshold_step), 3)
 
-    # Convert float parameters to rounded values for display/keys if needed, but use raw for calculation
-    # Adjusted rounding to match the potential step size for buy_threshold and sell_threshold
-    param_combinations = [(p[0], p[1], p[2], p[3], round(p[4], 3), round(p[5], 3), p[6], p[7]) for p in param_combinations]
+    # Parameter combinations are generated lazily while optimizing - only the count is needed up front
+    num_combinations = len(buy_threshold_values) * len(sell_threshold_values)
 
 
-    st.write(f"Testing {len(param_combinations)} parameter combinations.")
+    st.write(f"Testing {num_combinations} parameter combinations.")
+
+    top_k = st.number_input("Leaderboard Size (top results kept)", min_value=1, max_value=1000, value=20, step=1, key='opt_top_k')
+    rank_by_robustness = st.checkbox("🎲 Re-rank leaderboard by bootstrap robustness (5th percentile ending capital)", key='opt_rank_by_robustness')
 
 
     # Optimization Button
     if st.button("Run Optimization", key='run_optimizer'): # Added unique key
-        if not param_combinations:
+        if num_combinations == 0:
             st.warning("Please define valid parameter ranges.")
             st.stop()
 
@@ -185,15 +284,32 @@ with tab2:
             st.success("✅ Data Fetched Successfully!")
             st.write("🔬 Running optimization...")
 
+            # projection_pattern_strategy only reads Close, so every run gets this one-column frame
+            # (built once) instead of a full df_opt.copy(). The strategy still copies its input once
+            # per run to write its result columns, but that copy is now a single column wide
+            price_view = df_opt[['Close']]
+
+            param_combinations = itertools.product(
+                [pattern_len_opt], # Use single value from slider
+                [proj_len_opt], # Use single value from slider
+                [pattern_offset_opt], # Use single value from slider
+                [max_matches_opt], # Use single value from slider
+                buy_threshold_values, # Use range for buy threshold
+                sell_threshold_values, # Use range for sell threshold
+                [cooldown_opt], # Use single value from slider
+                [min_bars_opt] # Use single value from slider
+            )
+
             best_profit = -float('inf')
             best_params = None
-            optimization_results = []
+            optimization_records = np.empty(num_combinations, dtype=OPTIMIZATION_RECORD_DTYPE)
+            leaderboard = [] # Min-heap of (profit, -run index), bounded to top_k entries
 
             progress_bar = st.progress(0)
             status_text = st.empty()
+            starting_capital_opt = 10000
 
-            # Iterate directly over itertools.product or the list
-            for i, params in enumerate(param_combinations): # Iterating over the list generated upfront
+            for i, params in enumerate(param_combinations):
                 pattern_len, proj_len, pattern_offset, max_matches, buy_threshold, sell_threshold, cooldown, min_bars = params
 
                 # Run the strategy with the current parameters
@@ -202,24 +318,24 @@ with tab2:
                     'proj_len': proj_len,
                     'pattern_offset': pattern_offset,
                     'max_matches': max_matches,
-                    'buy_threshold': buy_threshold,
-                    'sell_threshold': sell_threshold,
+                    'buy_threshold': float(buy_threshold),
+                    'sell_threshold': float(sell_threshold),
                     'cooldown': cooldown,
                     'min_bars': min_bars
                 }
-                # Pass a copy of df_opt to ensure each strategy run is independent
-                results_opt, trade_log_opt = projection_pattern_strategy(df_opt.copy(), **current_params)
+                results_opt, _ = projection_pattern_strategy(price_view, **current_params)
 
-                # Calculate profit for this run
-                starting_capital_opt = 10000
+                # Reduce the run to its ending capital and drop the full results frame right away
                 ending_capital_opt = results_opt['Equity'].iloc[-1] if not results_opt.empty and 'Equity' in results_opt.columns else starting_capital_opt
+                del results_opt
                 current_profit = ending_capital_opt - starting_capital_opt
 
-                optimization_results.append({
-                    'Parameters': params,
-                    'Ending Capital': ending_capital_opt,
-                    'Profit': current_profit
-                })
+                optimization_records[i] = params + (ending_capital_opt, current_profit)
+
+                if len(leaderboard) < top_k:
+                    heapq.heappush(leaderboard, (current_profit, -i))
+                else:
+                    heapq.heappushpop(leaderboard, (current_profit, -i))
 
                 # Check if this is the best profit found so far
                 if current_profit > best_profit:
@@ -227,9 +343,9 @@ with tab2:
                     best_params = params
 
                 # Update progress bar and status text
-                progress = (i + 1) / len(param_combinations)
+                progress = (i + 1) / num_combinations
                 progress_bar.progress(progress)
-                status_text.text(f"Completed {i + 1}/{len(param_combinations)} combinations. Current best profit: ${best_profit:,.2f}")
+                status_text.text(f"Completed {i + 1}/{num_combinations} combinations. Current best profit: ${best_profit:,.2f}")
 
 
             st.subheader("Optimization Results")
@@ -249,13 +365,67 @@ with tab2:
                 st.write(f"**Corresponding Ending Capital:** ${best_profit + 10000:,.2f}") # Assuming starting capital is 10000
 
 
-            # Optionally display a table of all results (can be large)
-            if st.checkbox("Show all optimization results"):
-                 optimization_results_df = pd.DataFrame(optimization_results)
-                 st.dataframe(optimization_results_df.sort_values(by='Profit', ascending=False))
+            # Leaderboard of the top-K runs, read back from the compact record array
+            st.subheader(f"🏅 Top {len(leaderboard)} Results")
+            top_indices = [-neg_index for _, neg_index in sorted(leaderboard, reverse=True)]
+            leaderboard_df = pd.DataFrame(optimization_records[top_indices])
+            leaderboard_df.columns = [
+                'Pattern Length', 'Projection Length', 'Pattern Start Offset', 'Max Historical Matches',
+                'Buy Signal Threshold (%)', 'Sell Signal Threshold (%)', 'Signal Cooldown (bars)', 'Minimum Bars',
+                'Ending Capital', 'Profit'
+            ]
+            st.dataframe(leaderboard_df)
+
+            # Re-run only the top-K candidates to get their trade logs, then rank them on resampled outcomes
+            if rank_by_robustness:
+                st.subheader("🎲 Leaderboard Ranked by Robustness")
+                candidates = []
+                for record in optimization_records[top_indices]:
+                    candidate_params = {name: record[name].item() for name in OPTIMIZATION_RECORD_DTYPE.names[:8]}
+                    _, candidate_trade_log = projection_pattern_strategy(price_view, **candidate_params)
+                    candidates.append((tuple(candidate_params.values()), candidate_trade_log))
+                st.dataframe(rank_candidates(candidates))
 
 
         except Exception as e:
             st.error(f"❌ Error during optimization: {e}")
 
 
+    # --- Moving Average Crossover Sweep ---
+    st.header("Moving Average Crossover Sweep")
+    st.write("Evaluate every (short, long) window pair in one vectorized pass and compare ending capital on a heatmap.")
+
+    short_window_range = st.slider("Short Window Range", min_value=2, max_value=50, value=(2, 20), step=1, key='sweep_short_window_range')
+    long_window_range = st.slider("Long Window Range", min_value=5, max_value=200, value=(10, 100), step=1, key='sweep_long_window_range')
+
+    if st.button("Run Crossover Sweep", key='run_crossover_sweep'): # Added unique key
+        try:
+            st.write("🔹 Fetching Data for Crossover Sweep...")
+            df_sweep = fetch_stock_indices_data(
+                instrument_opt, offer_side_opt, interval_options[interval_opt], limit_opt, "P" # Reuse the optimizer data inputs
+            )
+
+            if df_sweep.empty:
+                st.error("❌ No data received for crossover sweep.")
+                st.stop()
+
+            ending_capital_grid, trade_count_grid = moving_average_crossover_sweep(
+                df_sweep,
+                range(short_window_range[0], short_window_range[1] + 1),
+                range(long_window_range[0], long_window_range[1] + 1)
+            )
+
+            if ending_capital_grid.isna().all().all():
+                st.warning("No valid window pairs: the short window must be smaller than the long window.")
+                st.stop()
+
+            st.plotly_chart(generate_crossover_heatmap(ending_capital_grid), use_container_width=True)
+
+            best_short, best_long = ending_capital_grid.stack().idxmax()
+            best_capital = ending_capital_grid.loc[best_short, best_long]
+            st.success(f"🏆 **Best Windows:** Short {best_short} / Long {best_long}")
+            st.write(f"**Ending Capital:** ${best_capital:,.2f}")
+            st.write(f"**Completed Trades:** {int(trade_count_grid.loc[best_short, best_long])}")
+
+        except Exception as e:
+            st.error(f"❌ Error during crossover sweep: {e}")